@@ -1,631 +1,1208 @@
-import streamlit as st
-import torch
-from PIL import Image
-import io
-from typing import Dict, List, Tuple, Optional
-import json
-
-from transformers import (
-    BlipProcessor,
-    BlipForConditionalGeneration,
-    ViTImageProcessor,
-    ViTForImageClassification,
-    AutoTokenizer,
-    AutoModelForSeq2SeqLM
-)
-
-# -----------------------------
-# Page Configuration
-# -----------------------------
-st.set_page_config(
-    page_title="AI Vision Recipe Generator",
-    page_icon="🍽️",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# -----------------------------
-# Custom CSS
-# -----------------------------
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 3rem;
-        font-weight: 700;
-        background: linear-gradient(90deg, #FF6B6B 0%, #FFE66D 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        text-align: center;
-        padding: 1rem 0;
-    }
-    
-    .subtitle {
-        text-align: center;
-        color: #B0B0B0;
-        font-size: 1.2rem;
-        margin-bottom: 2rem;
-    }
-    
-    .prediction-card {
-        background-color: #1E1E1E;
-        border-radius: 10px;
-        padding: 1.5rem;
-        margin: 1rem 0;
-        border-left: 4px solid #FF6B6B;
-    }
-    
-    .confidence-bar {
-        background-color: #2E2E2E;
-        border-radius: 5px;
-        height: 10px;
-        margin-top: 0.5rem;
-        overflow: hidden;
-    }
-    
-    .confidence-fill {
-        background: linear-gradient(90deg, #FF6B6B 0%, #FFE66D 100%);
-        height: 100%;
-        transition: width 0.3s ease;
-    }
-    
-    .recipe-section {
-        background-color: #1E1E1E;
-        border-radius: 10px;
-        padding: 2rem;
-        margin: 1rem 0;
-    }
-    
-    .ingredient-item {
-        padding: 0.5rem;
-        margin: 0.3rem 0;
-        background-color: #2E2E2E;
-        border-radius: 5px;
-    }
-    
-    .nutrition-card {
-        background-color: #2E2E2E;
-        border-radius: 10px;
-        padding: 1rem;
-        text-align: center;
-        margin: 0.5rem;
-    }
-    
-    .step-number {
-        display: inline-block;
-        background-color: #FF6B6B;
-        color: white;
-        border-radius: 50%;
-        width: 30px;
-        height: 30px;
-        text-align: center;
-        line-height: 30px;
-        margin-right: 10px;
-        font-weight: bold;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# -----------------------------
-# Header
-# -----------------------------
-st.markdown('<h1 class="main-header">🍽️ AI Vision Recipe Generator</h1>', unsafe_allow_html=True)
-st.markdown('<p class="subtitle">Upload a food image and get personalized recipes with AI-powered analysis</p>', unsafe_allow_html=True)
-
-# -----------------------------
-# Device Configuration
-# -----------------------------
-device = "cuda" if torch.cuda.is_available() else "cpu"
-
-# Display system info in sidebar
-with st.sidebar:
-    st.header("⚙️ System Information")
-    st.info(f"**Device:** {device.upper()}")
-    st.info(f"**CUDA Available:** {torch.cuda.is_available()}")
-    if torch.cuda.is_available():
-        st.info(f"**GPU:** {torch.cuda.get_device_name(0)}")
-
-# -----------------------------
-# Model Loading with Enhanced Caching
-# -----------------------------
-@st.cache_resource(show_spinner=False)
-def load_models() -> Tuple:
-    """Load all AI models with error handling"""
-    try:
-        # BLIP for image captioning
-        blip_processor = BlipProcessor.from_pretrained(
-            "Salesforce/blip-image-captioning-base"
-        )
-        blip_model = BlipForConditionalGeneration.from_pretrained(
-            "Salesforce/blip-image-captioning-base"
-        ).to(device)
-        
-        # ViT for food classification
-        food_processor = ViTImageProcessor.from_pretrained(
-            "nateraw/food"
-        )
-        food_model = ViTForImageClassification.from_pretrained(
-            "nateraw/food"
-        ).to(device)
-        
-        # FLAN-T5 for recipe generation (using larger model)
-        flan_tokenizer = AutoTokenizer.from_pretrained(
-            "google/flan-t5-large"
-        )
-        flan_model = AutoModelForSeq2SeqLM.from_pretrained(
-            "google/flan-t5-large"
-        ).to(device)
-        
-        return (
-            blip_processor, blip_model,
-            food_processor, food_model,
-            flan_tokenizer, flan_model
-        )
-    except Exception as e:
-        st.error(f"Error loading models: {str(e)}")
-        st.stop()
-
-# Load models with progress indicator
-with st.spinner("🔄 Loading AI models... This may take a moment on first run."):
-    try:
-        (
-            blip_processor, blip_model,
-            food_processor, food_model,
-            flan_tokenizer, flan_model
-        ) = load_models()
-        st.sidebar.success("✅ All models loaded successfully!")
-    except Exception as e:
-        st.error(f"Failed to load models: {str(e)}")
-        st.stop()
-
-# -----------------------------
-# Helper Functions
-# -----------------------------
-def validate_image(image: Image.Image) -> bool:
-    """Validate uploaded image"""
-    try:
-        # Check image size
-        if image.size[0] < 50 or image.size[1] < 50:
-            st.error("❌ Image is too small. Please upload a larger image (at least 50x50 pixels).")
-            return False
-        
-        # Check file size (approximate)
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='PNG')
-        size_mb = len(img_byte_arr.getvalue()) / (1024 * 1024)
-        
-        if size_mb > 10:
-            st.error("❌ Image is too large. Please upload an image smaller than 10MB.")
-            return False
-            
-        return True
-    except Exception as e:
-        st.error(f"❌ Error validating image: {str(e)}")
-        return False
-
-def generate_caption(image: Image.Image) -> str:
-    """Generate image caption using BLIP"""
-    try:
-        inputs = blip_processor(
-            images=image,
-            return_tensors="pt"
-        ).to(device)
-        
-        output = blip_model.generate(
-            **inputs,
-            max_length=50,
-            num_beams=5,
-            temperature=0.7
-        )
-        
-        caption = blip_processor.decode(
-            output[0],
-            skip_special_tokens=True
-        )
-        return caption
-    except Exception as e:
-        st.error(f"Error generating caption: {str(e)}")
-        return "Unable to generate caption"
-
-def classify_food(image: Image.Image, top_k: int = 5) -> List[Tuple[str, float]]:
-    """Classify food with top-k predictions"""
-    try:
-        inputs = food_processor(
-            images=image,
-            return_tensors="pt"
-        ).to(device)
-        
-        with torch.no_grad():
-            outputs = food_model(**inputs)
-        
-        # Get probabilities
-        probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-        
-        # Get top-k predictions
-        top_probs, top_indices = torch.topk(probs[0], top_k)
-        
-        results = []
-        for prob, idx in zip(top_probs, top_indices):
-            label = food_model.config.id2label[idx.item()]
-            confidence = prob.item()
-            results.append((label, confidence))
-        
-        return results
-    except Exception as e:
-        st.error(f"Error classifying food: {str(e)}")
-        return [("Unknown", 0.0)]
-
-def estimate_nutrition(dish: str) -> Dict[str, str]:
-    """Estimate nutritional information (simplified)"""
-    # This is a simplified estimation. In production, use a nutrition API
-    nutrition_db = {
-        "pizza": {"calories": "285", "protein": "12g", "carbs": "36g", "fat": "10g"},
-        "burger": {"calories": "540", "protein": "25g", "carbs": "40g", "fat": "27g"},
-        "salad": {"calories": "150", "protein": "5g", "carbs": "15g", "fat": "8g"},
-        "pasta": {"calories": "350", "protein": "13g", "carbs": "60g", "fat": "7g"},
-        "sushi": {"calories": "200", "protein": "9g", "carbs": "30g", "fat": "6g"},
-    }
-    
-    # Try to match dish with database
-    dish_lower = dish.lower()
-    for key in nutrition_db:
-        if key in dish_lower:
-            return nutrition_db[key]
-    
-    # Default values
-    return {"calories": "~300", "protein": "~15g", "carbs": "~40g", "fat": "~12g"}
-
-def generate_recipe(
-    dish: str, 
-    caption: str, 
-    dietary_pref: str = "None",
-    servings: int = 4,
-    difficulty: str = "Medium"
-) -> str:
-    """Generate detailed recipe with FLAN-T5"""
-    try:
-        # Enhanced prompt with dietary preferences
-        dietary_clause = f"The recipe must be {dietary_pref}. " if dietary_pref != "None" else ""
-        
-        prompt = f"""You are a professional chef. Create a detailed recipe.
-
-Dish: {dish}
-Description: {caption}
-{dietary_clause}Servings: {servings}
-Difficulty: {difficulty}
-
-Provide:
-1. Ingredients (with exact measurements)
-2. Step-by-step instructions (numbered)
-3. Prep time and cook time
-4. Tips and variations
-
-Format the recipe clearly and professionally."""
-
-        inputs = flan_tokenizer(
-            prompt,
-            return_tensors="pt",
-            truncation=True,
-            max_length=512,
-            padding=True
-        ).to(device)
-        
-        outputs = flan_model.generate(
-            **inputs,
-            max_length=600,
-            min_length=200,
-            num_beams=5,
-            temperature=0.8,
-            top_p=0.95,
-            repetition_penalty=1.2,
-            no_repeat_ngram_size=3
-        )
-        
-        recipe = flan_tokenizer.decode(
-            outputs[0],
-            skip_special_tokens=True
-        )
-        
-        return recipe
-    except Exception as e:
-        st.error(f"Error generating recipe: {str(e)}")
-        return "Unable to generate recipe. Please try again."
-
-# -----------------------------
-# Sidebar Configuration
-# -----------------------------
-with st.sidebar:
-    st.header("🎛️ Recipe Settings")
-    
-    dietary_pref = st.selectbox(
-        "Dietary Preference",
-        ["None", "Vegetarian", "Vegan", "Gluten-Free", "Keto", "Low-Carb", "Dairy-Free"],
-        help="Select dietary restrictions for recipe generation"
-    )
-    
-    servings = st.slider(
-        "Number of Servings",
-        min_value=1,
-        max_value=12,
-        value=4,
-        help="Adjust recipe serving size"
-    )
-    
-    difficulty = st.select_slider(
-        "Recipe Difficulty",
-        options=["Easy", "Medium", "Hard"],
-        value="Medium",
-        help="Choose your preferred recipe complexity"
-    )
-    
-    show_top_k = st.checkbox(
-        "Show Top 5 Predictions",
-        value=True,
-        help="Display multiple food detection results with confidence scores"
-    )
-    
-    st.markdown("---")
-    st.header("📊 Statistics")
-    
-    # Session state for tracking
-    if 'recipes_generated' not in st.session_state:
-        st.session_state.recipes_generated = 0
-    
-    st.metric("Recipes Generated", st.session_state.recipes_generated)
-
-# -----------------------------
-# Main UI
-# -----------------------------
-uploaded_file = st.file_uploader(
-    "📤 Upload a food image (JPG, PNG, JPEG)",
-    type=["jpg", "png", "jpeg"],
-    help="Upload a clear photo of food for best results"
-)
-
-if uploaded_file:
-    try:
-        # Load and validate image
-        image = Image.open(uploaded_file).convert("RGB")
-        
-        if not validate_image(image):
-            st.stop()
-        
-        # Display image and controls
-        col1, col2 = st.columns([1, 1])
-        
-        with col1:
-            st.image(image, caption="📷 Uploaded Image", use_container_width=True)
-            
-            # Image info
-            st.caption(f"Image Size: {image.size[0]} x {image.size[1]} pixels")
-        
-        with col2:
-            st.markdown("### 🔍 Analysis Options")
-            
-            analyze_button = st.button(
-                "🍳 Generate Recipe",
-                type="primary",
-                use_container_width=True
-            )
-            
-            if analyze_button:
-                # Progress tracking
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                try:
-                    # Step 1: Generate caption
-                    status_text.text("🔍 Analyzing image...")
-                    progress_bar.progress(25)
-                    caption = generate_caption(image)
-                    
-                    # Step 2: Classify food
-                    status_text.text("🍽️ Detecting food items...")
-                    progress_bar.progress(50)
-                    food_predictions = classify_food(image, top_k=5 if show_top_k else 1)
-                    
-                    # Step 3: Generate recipe
-                    status_text.text("📝 Generating recipe...")
-                    progress_bar.progress(75)
-                    
-                    primary_dish = food_predictions[0][0]
-                    recipe = generate_recipe(
-                        primary_dish,
-                        caption,
-                        dietary_pref,
-                        servings,
-                        difficulty
-                    )
-                    
-                    # Step 4: Get nutrition info
-                    status_text.text("📊 Estimating nutrition...")
-                    progress_bar.progress(90)
-                    nutrition = estimate_nutrition(primary_dish)
-                    
-                    progress_bar.progress(100)
-                    status_text.empty()
-                    progress_bar.empty()
-                    
-                    # Update statistics
-                    st.session_state.recipes_generated += 1
-                    
-                    # Display results
-                    st.markdown("---")
-                    
-                    # Food Detection Results
-                    st.markdown("### 🎯 Food Detection Results")
-                    
-                    if show_top_k:
-                        for idx, (label, confidence) in enumerate(food_predictions, 1):
-                            confidence_pct = confidence * 100
-                            
-                            st.markdown(f"""
-                            <div class="prediction-card">
-                                <h4>#{idx} {label}</h4>
-                                <p>Confidence: {confidence_pct:.2f}%</p>
-                                <div class="confidence-bar">
-                                    <div class="confidence-fill" style="width: {confidence_pct}%"></div>
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                    else:
-                        label, confidence = food_predictions[0]
-                        st.success(f"**Detected:** {label} ({confidence*100:.2f}% confidence)")
-                    
-                    # Image Description
-                    st.markdown("### 📝 Image Description")
-                    st.info(caption)
-                    
-                    # Nutritional Information
-                    st.markdown("### 🥗 Estimated Nutrition (per serving)")
-                    
-                    col_n1, col_n2, col_n3, col_n4 = st.columns(4)
-                    
-                    with col_n1:
-                        st.markdown(f"""
-                        <div class="nutrition-card">
-                            <h3>{nutrition['calories']}</h3>
-                            <p>Calories</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col_n2:
-                        st.markdown(f"""
-                        <div class="nutrition-card">
-                            <h3>{nutrition['protein']}</h3>
-                            <p>Protein</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col_n3:
-                        st.markdown(f"""
-                        <div class="nutrition-card">
-                            <h3>{nutrition['carbs']}</h3>
-                            <p>Carbs</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col_n4:
-                        st.markdown(f"""
-                        <div class="nutrition-card">
-                            <h3>{nutrition['fat']}</h3>
-                            <p>Fat</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    # Recipe
-                    st.markdown("### 📖 Generated Recipe")
-                    st.markdown(f"""
-                    <div class="recipe-section">
-                        <h3>{primary_dish}</h3>
-                        <p><strong>Servings:</strong> {servings} | <strong>Difficulty:</strong> {difficulty}</p>
-                        {dietary_pref != "None" and f"<p><strong>Dietary:</strong> {dietary_pref}</p>" or ""}
-                        <hr>
-                        <div style="white-space: pre-wrap;">{recipe}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Export options
-                    st.markdown("### 💾 Export Recipe")
-                    
-                    recipe_text = f"""
-{primary_dish}
-{"=" * 50}
-
-Servings: {servings}
-Difficulty: {difficulty}
-{f"Dietary: {dietary_pref}" if dietary_pref != "None" else ""}
-
-Image Description: {caption}
-
-NUTRITIONAL INFORMATION (per serving):
-- Calories: {nutrition['calories']}
-- Protein: {nutrition['protein']}
-- Carbs: {nutrition['carbs']}
-- Fat: {nutrition['fat']}
-
-RECIPE:
-{recipe}
-
----
-Generated by AI Vision Recipe Generator
-"""
-                    
-                    st.download_button(
-                        label="📥 Download Recipe (TXT)",
-                        data=recipe_text,
-                        file_name=f"{primary_dish.replace(' ', '_')}_recipe.txt",
-                        mime="text/plain"
-                    )
-                    
-                except Exception as e:
-                    st.error(f"❌ An error occurred during processing: {str(e)}")
-                    st.info("Please try uploading a different image or check your internet connection.")
-    
-    except Exception as e:
-        st.error(f"❌ Error loading image: {str(e)}")
-        st.info("Please upload a valid image file.")
-
-else:
-    # Landing state with examples
-    st.markdown("### 🌟 How It Works")
-    
-    col_info1, col_info2, col_info3 = st.columns(3)
-    
-    with col_info1:
-        st.markdown("""
-        <div style="text-align: center; padding: 2rem;">
-            <h2>1️⃣</h2>
-            <h4>Upload Image</h4>
-            <p>Take or upload a photo of your food</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col_info2:
-        st.markdown("""
-        <div style="text-align: center; padding: 2rem;">
-            <h2>2️⃣</h2>
-            <h4>AI Analysis</h4>
-            <p>Our AI identifies the dish and analyzes ingredients</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col_info3:
-        st.markdown("""
-        <div style="text-align: center; padding: 2rem;">
-            <h2>3️⃣</h2>
-            <h4>Get Recipe</h4>
-            <p>Receive a complete recipe with instructions</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("---")
-    
-    # Features
-    st.markdown("### ✨ Features")
-    
-    features_col1, features_col2 = st.columns(2)
-    
-    with features_col1:
-        st.markdown("""
-        - 🎯 **Accurate Food Detection** - Identify 101+ food items
-        - 📝 **Detailed Recipes** - Step-by-step cooking instructions
-        - 🥗 **Nutrition Estimates** - Calorie and macro information
-        - 🌱 **Dietary Options** - Support for various dietary restrictions
-        """)
-    
-    with features_col2:
-        st.markdown("""
-        - 🔢 **Serving Adjustments** - Scale recipes for any number
-        - 📊 **Confidence Scores** - Multiple predictions with probabilities
-        - 💾 **Recipe Export** - Download recipes as text files
-        - ⚡ **Fast Processing** - Quick AI-powered analysis
-        """)
-
-# Footer
-st.markdown("---")
-st.markdown("""
-<div style="text-align: center; color: #888;">
-    <p>Powered by BLIP, ViT, and FLAN-T5 🤖</p>
-    <p>Made with ❤️ using Streamlit</p>
-</div>
-""", unsafe_allow_html=True)
+import streamlit as st
+import numpy as np
+import torch
+import torch.nn.functional as F
+from PIL import Image
+import contextlib
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Optional
+import json
+
+from transformers import (
+    BlipProcessor,
+    BlipForConditionalGeneration,
+    ViTImageProcessor,
+    ViTForImageClassification,
+    AutoTokenizer,
+    AutoModelForSeq2SeqLM
+)
+
+from config import config
+from utils import estimate_nutrition
+
+# -----------------------------
+# Page Configuration
+# -----------------------------
+st.set_page_config(
+    page_title="AI Vision Recipe Generator",
+    page_icon="🍽️",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# -----------------------------
+# Custom CSS
+# -----------------------------
+st.markdown("""
+<style>
+    .main-header {
+        font-size: 3rem;
+        font-weight: 700;
+        background: linear-gradient(90deg, #FF6B6B 0%, #FFE66D 100%);
+        -webkit-background-clip: text;
+        -webkit-text-fill-color: transparent;
+        text-align: center;
+        padding: 1rem 0;
+    }
+    
+    .subtitle {
+        text-align: center;
+        color: #B0B0B0;
+        font-size: 1.2rem;
+        margin-bottom: 2rem;
+    }
+    
+    .prediction-card {
+        background-color: #1E1E1E;
+        border-radius: 10px;
+        padding: 1.5rem;
+        margin: 1rem 0;
+        border-left: 4px solid #FF6B6B;
+    }
+    
+    .confidence-bar {
+        background-color: #2E2E2E;
+        border-radius: 5px;
+        height: 10px;
+        margin-top: 0.5rem;
+        overflow: hidden;
+    }
+    
+    .confidence-fill {
+        background: linear-gradient(90deg, #FF6B6B 0%, #FFE66D 100%);
+        height: 100%;
+        transition: width 0.3s ease;
+    }
+    
+    .recipe-section {
+        background-color: #1E1E1E;
+        border-radius: 10px;
+        padding: 2rem;
+        margin: 1rem 0;
+    }
+    
+    .ingredient-item {
+        padding: 0.5rem;
+        margin: 0.3rem 0;
+        background-color: #2E2E2E;
+        border-radius: 5px;
+    }
+    
+    .nutrition-card {
+        background-color: #2E2E2E;
+        border-radius: 10px;
+        padding: 1rem;
+        text-align: center;
+        margin: 0.5rem;
+    }
+    
+    .step-number {
+        display: inline-block;
+        background-color: #FF6B6B;
+        color: white;
+        border-radius: 50%;
+        width: 30px;
+        height: 30px;
+        text-align: center;
+        line-height: 30px;
+        margin-right: 10px;
+        font-weight: bold;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+# -----------------------------
+# Header
+# -----------------------------
+st.markdown('<h1 class="main-header">🍽️ AI Vision Recipe Generator</h1>', unsafe_allow_html=True)
+st.markdown('<p class="subtitle">Upload a food image and get personalized recipes with AI-powered analysis</p>', unsafe_allow_html=True)
+
+# -----------------------------
+# Device Configuration
+# -----------------------------
+device = "cuda" if torch.cuda.is_available() else "cpu"
+
+def _inference_dtype() -> torch.dtype:
+    """Pick the best inference dtype for the current device"""
+    if torch.cuda.is_available():
+        # Half precision doubles matmul throughput and halves bandwidth
+        return torch.float16
+    # BF16 on CPU only pays off with AMX tiles (Sapphire Rapids+)
+    amx_supported = getattr(torch.cpu, "_is_amx_tile_supported", None)
+    if amx_supported is not None and amx_supported():
+        return torch.bfloat16
+    return torch.float32
+
+model_dtype = _inference_dtype()
+
+def _autocast():
+    """Autocast context matching the selected inference dtype"""
+    if model_dtype == torch.float32:
+        return contextlib.nullcontext()
+    return torch.autocast(device_type=device, dtype=model_dtype)
+
+# T5 checkpoints are bf16-trained and overflow in fp16, so FLAN keeps
+# bfloat16 on GPU while the vision models use the fp16 fast path
+flan_dtype = torch.bfloat16 if device == "cuda" else model_dtype
+
+def _flan_autocast():
+    """Autocast for FLAN-T5 generation (bf16 on GPU, never fp16)"""
+    if flan_dtype == torch.float32:
+        return contextlib.nullcontext()
+    return torch.autocast(device_type=device, dtype=flan_dtype)
+
+# Display system info in sidebar
+with st.sidebar:
+    st.header("⚙️ System Information")
+    st.info(f"**Device:** {device.upper()}")
+    st.info(f"**CUDA Available:** {torch.cuda.is_available()}")
+    if torch.cuda.is_available():
+        st.info(f"**GPU:** {torch.cuda.get_device_name(0)}")
+
+# -----------------------------
+# Model Loading with Enhanced Caching
+# -----------------------------
+def _export_onnx_model(model_cls, model_id: str, save_dir: str, **kwargs) -> str:
+    """Export a model to ONNX with graph optimization, caching on disk"""
+    from optimum.onnxruntime import ORTOptimizer
+    from optimum.onnxruntime.configuration import OptimizationConfig
+
+    if not os.path.isdir(save_dir):
+        # One-time export + graph optimization (fused LayerNorm/GELU/
+        # attention kernels); subsequent runs load the optimized graph
+        model = model_cls.from_pretrained(model_id, export=True, **kwargs)
+        optimizer = ORTOptimizer.from_pretrained(model)
+        optimizer.optimize(
+            optimization_config=OptimizationConfig(optimization_level=99),
+            save_dir=save_dir
+        )
+
+    return save_dir
+
+def _quantize_onnx_seq2seq(model_dir: str) -> str:
+    """Apply dynamic INT8 quantization to an exported seq2seq ONNX model"""
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    int8_dir = model_dir + "-int8"
+    if not os.path.isdir(int8_dir):
+        # Dynamic (no calibration) per-channel INT8: ~4x smaller weights
+        # and faster per-token decode on VNNI-capable CPUs. Quantize each
+        # exported graph (encoder, decoder, decoder_with_past).
+        qconfig = AutoQuantizationConfig.avx512_vnni(
+            is_static=False,
+            per_channel=True
+        )
+        for file_name in sorted(os.listdir(model_dir)):
+            if file_name.endswith(".onnx"):
+                quantizer = ORTQuantizer.from_pretrained(
+                    model_dir,
+                    file_name=file_name
+                )
+                quantizer.quantize(quantization_config=qconfig, save_dir=int8_dir)
+
+    return int8_dir
+
+def _load_onnx_generation_models(include_flan: bool = True) -> Tuple:
+    """Load BLIP and FLAN-T5 through ONNX Runtime (optional path)"""
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTModelForVision2Seq
+
+    blip_dir = _export_onnx_model(
+        ORTModelForVision2Seq,
+        "Salesforce/blip-image-captioning-base",
+        os.path.join(config.ONNX_CACHE_DIR, "blip")
+    )
+    blip_model = ORTModelForVision2Seq.from_pretrained(blip_dir)
+
+    if not include_flan:
+        return blip_model, None
+
+    flan_dir = _export_onnx_model(
+        ORTModelForSeq2SeqLM,
+        config.FLAN_MODEL,
+        os.path.join(config.ONNX_CACHE_DIR, "flan-" + config.FLAN_MODEL_TIER),
+        use_cache=True,
+        use_merged=True
+    )
+    if config.ENABLE_INT8_FLAN:
+        flan_dir = _quantize_onnx_seq2seq(flan_dir)
+    flan_model = ORTModelForSeq2SeqLM.from_pretrained(
+        flan_dir,
+        use_cache=True,
+        use_merged=True
+    )
+
+    return blip_model, flan_model
+
+def _load_ct2_flan():
+    """Load a CTranslate2-converted FLAN-T5 engine (optional path)"""
+    import ctranslate2
+
+    # Keyed on the model tier (like the ONNX cache) so engines built
+    # from different FLAN sizes never serve from each other's directory
+    ct2_dir = f"{config.CT2_FLAN_DIR}-{config.FLAN_MODEL_TIER}"
+
+    if not os.path.isdir(ct2_dir):
+        # One-time conversion with INT8 weights; equivalent to running
+        # ct2-transformers-converter --model <flan> --quantization int8
+        from ctranslate2.converters import TransformersConverter
+
+        TransformersConverter(config.FLAN_MODEL).convert(
+            ct2_dir,
+            quantization="int8"
+        )
+
+    return ctranslate2.Translator(
+        ct2_dir,
+        device=device,
+        compute_type="int8_float16" if device == "cuda" else "int8"
+    )
+
+def _quantize_food_model(model):
+    """Apply INT8 quantization to the ViT food classifier (CPU only)"""
+    # INT8 weights are ~4x smaller and roughly double matmul throughput
+    # on VNNI-capable CPUs. Prefer Intel Neural Compressor when the
+    # optional dependency is installed; otherwise fall back to PyTorch
+    # dynamic quantization of the linear layers.
+    try:
+        from neural_compressor import PostTrainingQuantConfig
+        from neural_compressor.quantization import fit
+
+        quantized = fit(model, conf=PostTrainingQuantConfig(approach="dynamic"))
+        if quantized is not None:
+            return quantized
+    except ImportError:
+        pass
+
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+def _from_pretrained_sdpa(model_cls, model_id: str, **kwargs):
+    """from_pretrained preferring fused SDPA attention kernels"""
+    # scaled_dot_product_attention fuses the four attention matmuls and
+    # never materializes the full attention matrix (FlashAttention on
+    # GPU). Not every architecture/transformers version accepts the
+    # flag, so fall back to the default implementation.
+    try:
+        return model_cls.from_pretrained(
+            model_id, attn_implementation="sdpa", **kwargs
+        )
+    except (ValueError, TypeError):
+        return model_cls.from_pretrained(model_id, **kwargs)
+
+def _warmup_models(
+    blip_processor, blip_model,
+    food_processor, food_model,
+    flan_tokenizer, flan_model
+) -> None:
+    """Run one tiny inference per model to pay one-time startup costs"""
+    # The first real request otherwise absorbs allocator growth, cuDNN
+    # heuristic selection, and torch.compile capture. Best-effort only,
+    # with one try block per model so a single failure doesn't skip
+    # the remaining warmups.
+    dummy = Image.new("RGB", (224, 224))
+
+    try:
+        with _autocast():
+            inputs = blip_processor(images=dummy, return_tensors="pt").to(device)
+            blip_model.generate(**inputs, max_length=5, num_beams=1)
+    except Exception:
+        pass
+
+    try:
+        with _autocast():
+            inputs = food_processor(images=dummy, return_tensors="pt").to(device)
+            with torch.no_grad():
+                food_model(**inputs)
+    except Exception:
+        pass
+
+    try:
+        if hasattr(flan_model, "generate"):
+            with _flan_autocast():
+                tokens = flan_tokenizer("recipe", return_tensors="pt").to(device)
+                flan_model.generate(**tokens, max_new_tokens=4, num_beams=1)
+    except Exception:
+        pass
+
+@st.cache_resource(show_spinner=False)
+def load_models() -> Tuple:
+    """Load all AI models with error handling"""
+    try:
+        # BLIP for image captioning
+        blip_processor = BlipProcessor.from_pretrained(
+            "Salesforce/blip-image-captioning-base"
+        )
+
+        # Optional ONNX Runtime path for the two generation models
+        blip_model = flan_model = None
+        if config.USE_CTRANSLATE2:
+            try:
+                flan_model = _load_ct2_flan()
+            except ImportError:
+                # ctranslate2 not installed; use PyTorch/ONNX below
+                pass
+        if config.USE_ONNX_RUNTIME:
+            try:
+                blip_model, onnx_flan = _load_onnx_generation_models(
+                    include_flan=flan_model is None
+                )
+                flan_model = flan_model or onnx_flan
+            except ImportError:
+                # optimum[onnxruntime] not installed; use PyTorch below
+                pass
+
+        if blip_model is None:
+            blip_model = BlipForConditionalGeneration.from_pretrained(
+                "Salesforce/blip-image-captioning-base",
+                torch_dtype=model_dtype,
+                use_safetensors=True,
+                low_cpu_mem_usage=True
+            ).to(device)
+            # BLIP doesn't expose attn_implementation yet; optimum's
+            # BetterTransformer gives it the same fused-attention path
+            try:
+                from optimum.bettertransformer import BetterTransformer
+                blip_model = BetterTransformer.transform(blip_model)
+            except Exception:
+                pass
+
+        # ViT for food classification
+        food_processor = ViTImageProcessor.from_pretrained(
+            "nateraw/food"
+        )
+        # On CPU prefer the OpenVINO runtime when optimum-intel is
+        # installed: its graph optimizer + oneDNN kernels are 2-3x
+        # faster than eager PyTorch on Intel hardware
+        food_model = None
+        if device == "cpu" and config.USE_OPENVINO:
+            try:
+                from optimum.intel import OVModelForImageClassification
+
+                food_model = OVModelForImageClassification.from_pretrained(
+                    "nateraw/food",
+                    export=True,
+                    ov_config={"PERFORMANCE_HINT": "LATENCY"}
+                )
+            except ImportError:
+                pass
+
+        if food_model is None:
+            # INT8 dynamic quantization needs FP32 weights as its input
+            quantize_vit = device == "cpu" and config.ENABLE_INT8_VIT
+            food_model = _from_pretrained_sdpa(
+                ViTForImageClassification,
+                "nateraw/food",
+                torch_dtype=torch.float32 if quantize_vit else model_dtype,
+                use_safetensors=True,
+                low_cpu_mem_usage=True
+            ).to(device)
+
+            if quantize_vit:
+                food_model = _quantize_food_model(food_model)
+        
+        # FLAN-T5 for recipe generation (size tier set via FLAN_TIER)
+        flan_tokenizer = AutoTokenizer.from_pretrained(
+            config.FLAN_MODEL
+        )
+        if flan_model is None:
+            flan_model = _from_pretrained_sdpa(
+                AutoModelForSeq2SeqLM,
+                config.FLAN_MODEL,
+                torch_dtype=flan_dtype,
+                use_safetensors=True,
+                low_cpu_mem_usage=True
+            ).to(device)
+
+        # Compile the PyTorch models on GPU: Dynamo/Inductor fuse the
+        # graphs and strip per-call Python dispatch overhead, worth
+        # 20-50% on transformer inference. reduce-overhead relies on
+        # CUDA graphs, so this stays off on CPU (where the ONNX and
+        # INT8 paths cover the same ground). Skips ONNX-backed models.
+        if device == "cuda" and config.ENABLE_TORCH_COMPILE:
+            if isinstance(blip_model, torch.nn.Module):
+                blip_model = torch.compile(
+                    blip_model, mode="reduce-overhead", fullgraph=False
+                )
+            if isinstance(food_model, torch.nn.Module):
+                food_model = torch.compile(
+                    food_model, mode="reduce-overhead", fullgraph=False
+                )
+            if isinstance(flan_model, torch.nn.Module):
+                flan_model = torch.compile(
+                    flan_model, mode="reduce-overhead", fullgraph=False
+                )
+
+        _warmup_models(
+            blip_processor, blip_model,
+            food_processor, food_model,
+            flan_tokenizer, flan_model
+        )
+
+        return (
+            blip_processor, blip_model,
+            food_processor, food_model,
+            flan_tokenizer, flan_model
+        )
+    except Exception as e:
+        st.error(f"Error loading models: {str(e)}")
+        st.stop()
+
+# Load models with progress indicator
+with st.spinner("🔄 Loading AI models... This may take a moment on first run."):
+    try:
+        (
+            blip_processor, blip_model,
+            food_processor, food_model,
+            flan_tokenizer, flan_model
+        ) = load_models()
+        st.sidebar.success("✅ All models loaded successfully!")
+    except Exception as e:
+        st.error(f"Failed to load models: {str(e)}")
+        st.stop()
+
+# -----------------------------
+# Helper Functions
+# -----------------------------
+def validate_image(image: Image.Image, file_size: Optional[int] = None) -> bool:
+    """Validate uploaded image"""
+    try:
+        # Check image size
+        if image.size[0] < 50 or image.size[1] < 50:
+            st.error("❌ Image is too small. Please upload a larger image (at least 50x50 pixels).")
+            return False
+
+        # Check file size using the real upload size; re-encoding the
+        # image to PNG just to measure it cost hundreds of ms on large
+        # uploads
+        if file_size is not None:
+            size_mb = file_size / (1024 * 1024)
+
+            if size_mb > 10:
+                st.error("❌ Image is too large. Please upload an image smaller than 10MB.")
+                return False
+
+        return True
+    except Exception as e:
+        st.error(f"❌ Error validating image: {str(e)}")
+        return False
+
+def _to_device(inputs):
+    """Move processor outputs to the device, pinned + async on GPU"""
+    # Pinned staging buffers let cudaMemcpy run asynchronously, so the
+    # copy overlaps whatever the GPU is already doing instead of a
+    # blocking pageable transfer per call.
+    if device != "cuda":
+        return inputs
+    return {
+        k: v.pin_memory().to(device, non_blocking=True)
+        for k, v in inputs.items()
+    }
+
+def _processor_input_size(processor) -> Tuple[int, int]:
+    """Resolve the (height, width) a processor resizes images to"""
+    image_processor = getattr(processor, "image_processor", processor)
+    size = image_processor.size
+    height = size.get("height") or size.get("shortest_edge")
+    width = size.get("width") or height
+    return height, width
+
+def prep_image(image: Image.Image) -> Dict[str, Dict[str, torch.Tensor]]:
+    """Preprocess an image once for both vision models"""
+    # The BLIP and ViT processors each do their own PIL resize +
+    # normalize pass over the same image. Convert to a float tensor
+    # once, then give each model an interpolated copy normalized with
+    # its own mean/std — half the preprocessing work per request.
+    tensor = (
+        torch.from_numpy(np.asarray(image))
+        .permute(2, 0, 1)
+        .float()
+        .div_(255.0)
+        .unsqueeze(0)
+    )
+
+    prepped = {}
+    for name, processor in (("blip", blip_processor), ("vit", food_processor)):
+        image_processor = getattr(processor, "image_processor", processor)
+        pixel_values = F.interpolate(
+            tensor,
+            size=_processor_input_size(processor),
+            mode="bicubic",
+            align_corners=False
+        )
+        mean = torch.tensor(image_processor.image_mean).view(1, 3, 1, 1)
+        std = torch.tensor(image_processor.image_std).view(1, 3, 1, 1)
+        pixel_values = (pixel_values - mean) / std
+        prepped[name] = _to_device({"pixel_values": pixel_values})
+
+    return prepped
+
+def _run_on_stream(fn, *args, **kwargs):
+    """Run an inference call on its own CUDA stream (no-op on CPU)"""
+    if device != "cuda":
+        return fn(*args, **kwargs)
+
+    stream = torch.cuda.Stream()
+    # The inputs were produced by async H2D copies on the caller's
+    # stream (prep_image); wait on it so the forward pass doesn't read
+    # tensors whose copies are still in flight
+    stream.wait_stream(torch.cuda.current_stream())
+    with torch.cuda.stream(stream):
+        result = fn(*args, **kwargs)
+    torch.cuda.current_stream().wait_stream(stream)
+    return result
+
+def generate_caption(
+    image: Image.Image,
+    num_beams: int = config.NUM_BEAMS,
+    inputs: Optional[Dict] = None
+) -> str:
+    """Generate image caption using BLIP"""
+    try:
+        if inputs is None:
+            inputs = _to_device(blip_processor(
+                images=image,
+                return_tensors="pt"
+            ))
+
+        with _autocast():
+            output = blip_model.generate(
+                **inputs,
+                max_length=config.MAX_CAPTION_LENGTH,
+                num_beams=num_beams,
+                temperature=0.7
+            )
+        
+        caption = blip_processor.decode(
+            output[0],
+            skip_special_tokens=True
+        )
+        return caption
+    except Exception as e:
+        st.error(f"Error generating caption: {str(e)}")
+        return "Unable to generate caption"
+
+def classify_food(
+    image: Image.Image,
+    top_k: int = 5,
+    inputs: Optional[Dict] = None
+) -> List[Tuple[str, float]]:
+    """Classify food with top-k predictions"""
+    try:
+        if inputs is None:
+            inputs = _to_device(food_processor(
+                images=image,
+                return_tensors="pt"
+            ))
+        
+        with torch.no_grad(), _autocast():
+            outputs = food_model(**inputs)
+        
+        # Softmax is monotonic, so rank on the raw logits and only
+        # normalize the selected k against the full logsumexp — same
+        # global confidences without materializing the whole
+        # probability tensor
+        logits = outputs.logits[0]
+        top_logits, top_indices = torch.topk(logits, top_k)
+        top_probs = torch.exp(top_logits - torch.logsumexp(logits, dim=-1))
+        
+        # Single bulk device->host transfer; calling .item() per scalar
+        # forced a GPU sync for every prediction
+        top_probs = top_probs.cpu().tolist()
+        top_indices = top_indices.cpu().tolist()
+        id2label = food_model.config.id2label
+
+        return [
+            (id2label[idx], prob)
+            for prob, idx in zip(top_probs, top_indices)
+        ]
+    except Exception as e:
+        st.error(f"Error classifying food: {str(e)}")
+        return [("Unknown", 0.0)]
+
+def generate_captions_batch(
+    images: List[Image.Image],
+    num_beams: int = config.NUM_BEAMS
+) -> List[str]:
+    """Generate captions for several images in one BLIP forward"""
+    try:
+        inputs = _to_device(blip_processor(
+            images=images,
+            return_tensors="pt"
+        ))
+
+        with _autocast():
+            output = blip_model.generate(
+                **inputs,
+                max_length=config.MAX_CAPTION_LENGTH,
+                num_beams=num_beams,
+                temperature=0.7
+            )
+
+        return [
+            blip_processor.decode(ids, skip_special_tokens=True)
+            for ids in output
+        ]
+    except Exception as e:
+        st.error(f"Error generating captions: {str(e)}")
+        return ["Unable to generate caption"] * len(images)
+
+def classify_food_batch(
+    images: List[Image.Image],
+    top_k: int = 5
+) -> List[List[Tuple[str, float]]]:
+    """Classify several food images in one ViT forward"""
+    try:
+        inputs = _to_device(food_processor(
+            images=images,
+            return_tensors="pt"
+        ))
+
+        with torch.no_grad(), _autocast():
+            outputs = food_model(**inputs)
+
+        logits = outputs.logits
+        top_logits, top_indices = torch.topk(logits, top_k, dim=-1)
+        top_probs = torch.exp(
+            top_logits - torch.logsumexp(logits, dim=-1, keepdim=True)
+        )
+
+        top_probs = top_probs.cpu().tolist()
+        top_indices = top_indices.cpu().tolist()
+        id2label = food_model.config.id2label
+
+        return [
+            [(id2label[idx], prob) for prob, idx in zip(prob_row, idx_row)]
+            for prob_row, idx_row in zip(top_probs, top_indices)
+        ]
+    except Exception as e:
+        st.error(f"Error classifying food: {str(e)}")
+        return [[("Unknown", 0.0)] for _ in images]
+
+def _generate_text(prompt: str, max_new_tokens: int, num_beams: int) -> str:
+    """Run one short FLAN-T5 generation for a recipe section"""
+    # CTranslate2 engine: beam search runs inside the fused C++
+    # decoder, so tokenize/detokenize here and skip HF generate()
+    if hasattr(flan_model, "translate_batch"):
+        tokens = flan_tokenizer.convert_ids_to_tokens(
+            flan_tokenizer.encode(prompt, truncation=True, max_length=512)
+        )
+        results = flan_model.translate_batch(
+            [tokens],
+            beam_size=num_beams,
+            max_decoding_length=max_new_tokens,
+            repetition_penalty=config.REPETITION_PENALTY,
+            no_repeat_ngram_size=3
+        )
+        return flan_tokenizer.convert_tokens_to_string(
+            results[0].hypotheses[0]
+        )
+
+    inputs = _to_device(flan_tokenizer(
+        prompt,
+        return_tensors="pt",
+        truncation=True,
+        max_length=512
+    ))
+
+    with _flan_autocast():
+        outputs = flan_model.generate(
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            num_beams=num_beams,
+            repetition_penalty=config.REPETITION_PENALTY,
+            no_repeat_ngram_size=3,
+            length_penalty=config.LENGTH_PENALTY,
+            early_stopping=True,
+            use_cache=True
+        )
+
+    return flan_tokenizer.decode(
+        outputs[0],
+        skip_special_tokens=True
+    )
+
+def generate_recipe(
+    dish: str,
+    caption: str,
+    dietary_pref: str = "None",
+    servings: int = 4,
+    difficulty: str = "Medium",
+    num_beams: int = config.NUM_BEAMS
+) -> str:
+    """Generate detailed recipe with FLAN-T5"""
+    try:
+        dietary_clause = f" The recipe must be {dietary_pref}." if dietary_pref != "None" else ""
+
+        context = (
+            f"You are a professional chef. Dish: {dish}. "
+            f"Description: {caption}.{dietary_clause} "
+            f"Servings: {servings}. Difficulty: {difficulty}."
+        )
+
+        # The recipe framing (headings, serving info) is deterministic,
+        # so only the free-text sections go through the model — two
+        # short decodes with tight token budgets instead of a single
+        # 600-token beam search over mostly boilerplate
+        ingredients = _generate_text(
+            context + " List only the ingredients with exact "
+            "measurements, one ingredient per line.",
+            max_new_tokens=config.MAX_INGREDIENTS_TOKENS,
+            num_beams=num_beams
+        )
+        steps = _generate_text(
+            context + " Write only the numbered step-by-step cooking "
+            "instructions.",
+            max_new_tokens=config.MAX_STEPS_TOKENS,
+            num_beams=num_beams
+        )
+
+        return (
+            f"INGREDIENTS:\n{ingredients.strip()}\n\n"
+            f"INSTRUCTIONS:\n{steps.strip()}"
+        )
+    except Exception as e:
+        st.error(f"Error generating recipe: {str(e)}")
+        return "Unable to generate recipe. Please try again."
+
+# -----------------------------
+# Result Caching
+# -----------------------------
+# Keyed on the upload's content hash (plus generation settings), so
+# re-clicking Generate Recipe on the same image skips all three models.
+# Leading-underscore args are excluded from Streamlit's cache key.
+@st.cache_data(show_spinner=False, max_entries=128)
+def cached_caption(
+    image_hash: str,
+    _image: Image.Image,
+    num_beams: int,
+    _inputs: Optional[Dict] = None
+) -> str:
+    """Content-hash cached wrapper around generate_caption"""
+    return generate_caption(_image, num_beams=num_beams, inputs=_inputs)
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def cached_classify(
+    image_hash: str,
+    _image: Image.Image,
+    top_k: int,
+    _inputs: Optional[Dict] = None
+) -> List[Tuple[str, float]]:
+    """Content-hash cached wrapper around classify_food"""
+    return classify_food(_image, top_k=top_k, inputs=_inputs)
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def cached_recipe(
+    image_hash: str,
+    dish: str,
+    caption: str,
+    dietary_pref: str,
+    servings: int,
+    difficulty: str,
+    num_beams: int
+) -> str:
+    """Content-hash cached wrapper around generate_recipe"""
+    return generate_recipe(
+        dish, caption, dietary_pref, servings, difficulty, num_beams=num_beams
+    )
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_caption_batch(
+    image_hashes: Tuple[str, ...],
+    _images: List[Image.Image],
+    num_beams: int
+) -> List[str]:
+    """Content-hash cached wrapper around generate_captions_batch"""
+    return generate_captions_batch(_images, num_beams=num_beams)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_classify_batch(
+    image_hashes: Tuple[str, ...],
+    _images: List[Image.Image],
+    top_k: int
+) -> List[List[Tuple[str, float]]]:
+    """Content-hash cached wrapper around classify_food_batch"""
+    return classify_food_batch(_images, top_k=top_k)
+
+# -----------------------------
+# Sidebar Configuration
+# -----------------------------
+with st.sidebar:
+    st.header("🎛️ Recipe Settings")
+    
+    dietary_pref = st.selectbox(
+        "Dietary Preference",
+        ["None", "Vegetarian", "Vegan", "Gluten-Free", "Keto", "Low-Carb", "Dairy-Free"],
+        help="Select dietary restrictions for recipe generation"
+    )
+    
+    servings = st.slider(
+        "Number of Servings",
+        min_value=1,
+        max_value=12,
+        value=4,
+        help="Adjust recipe serving size"
+    )
+    
+    difficulty = st.select_slider(
+        "Recipe Difficulty",
+        options=["Easy", "Medium", "Hard"],
+        value="Medium",
+        help="Choose your preferred recipe complexity"
+    )
+    
+    gen_preset = st.radio(
+        "Speed vs Quality",
+        options=list(config.GENERATION_PRESETS),
+        index=list(config.GENERATION_PRESETS).index(
+            config.DEFAULT_GENERATION_PRESET
+        ),
+        horizontal=True,
+        help="Fast uses greedy decoding; Quality uses wider beam search"
+    )
+    num_beams = config.GENERATION_PRESETS[gen_preset]
+
+    show_top_k = st.checkbox(
+        "Show Top 5 Predictions",
+        value=True,
+        help="Display multiple food detection results with confidence scores"
+    )
+    
+    st.markdown("---")
+    st.header("📊 Statistics")
+    
+    # Session state for tracking
+    if 'recipes_generated' not in st.session_state:
+        st.session_state.recipes_generated = 0
+    
+    st.metric("Recipes Generated", st.session_state.recipes_generated)
+
+# -----------------------------
+# Main UI
+# -----------------------------
+def render_results(entry, caption, food_predictions, primary_dish, recipe, nutrition):
+    """Render the analysis results for one image"""
+    # Food Detection Results
+    st.markdown("### 🎯 Food Detection Results")
+
+    if show_top_k:
+        for idx, (label, confidence) in enumerate(food_predictions, 1):
+            confidence_pct = confidence * 100
+
+            st.markdown(f"""
+            <div class="prediction-card">
+                <h4>#{idx} {label}</h4>
+                <p>Confidence: {confidence_pct:.2f}%</p>
+                <div class="confidence-bar">
+                    <div class="confidence-fill" style="width: {confidence_pct}%"></div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+    else:
+        label, confidence = food_predictions[0]
+        st.success(f"**Detected:** {label} ({confidence*100:.2f}% confidence)")
+
+    # Image Description
+    st.markdown("### 📝 Image Description")
+    st.info(caption)
+
+    # Nutritional Information
+    st.markdown("### 🥗 Estimated Nutrition (per serving)")
+
+    col_n1, col_n2, col_n3, col_n4 = st.columns(4)
+
+    with col_n1:
+        st.markdown(f"""
+        <div class="nutrition-card">
+            <h3>{nutrition['calories']}</h3>
+            <p>Calories</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col_n2:
+        st.markdown(f"""
+        <div class="nutrition-card">
+            <h3>{nutrition['protein']}</h3>
+            <p>Protein</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col_n3:
+        st.markdown(f"""
+        <div class="nutrition-card">
+            <h3>{nutrition['carbs']}</h3>
+            <p>Carbs</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col_n4:
+        st.markdown(f"""
+        <div class="nutrition-card">
+            <h3>{nutrition['fat']}</h3>
+            <p>Fat</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    # Recipe
+    st.markdown("### 📖 Generated Recipe")
+    st.markdown(f"""
+    <div class="recipe-section">
+        <h3>{primary_dish}</h3>
+        <p><strong>Servings:</strong> {servings} | <strong>Difficulty:</strong> {difficulty}</p>
+        {dietary_pref != "None" and f"<p><strong>Dietary:</strong> {dietary_pref}</p>" or ""}
+        <hr>
+        <div style="white-space: pre-wrap;">{recipe}</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Export options
+    st.markdown("### 💾 Export Recipe")
+
+    recipe_text = f"""
+{primary_dish}
+{"=" * 50}
+
+Servings: {servings}
+Difficulty: {difficulty}
+{f"Dietary: {dietary_pref}" if dietary_pref != "None" else ""}
+
+Image Description: {caption}
+
+NUTRITIONAL INFORMATION (per serving):
+- Calories: {nutrition['calories']}
+- Protein: {nutrition['protein']}
+- Carbs: {nutrition['carbs']}
+- Fat: {nutrition['fat']}
+
+RECIPE:
+{recipe}
+
+---
+Generated by AI Vision Recipe Generator
+"""
+
+    st.download_button(
+        label="📥 Download Recipe (TXT)",
+        data=recipe_text,
+        file_name=f"{primary_dish.replace(' ', '_')}_recipe.txt",
+        mime="text/plain",
+        key=f"download_{entry['index']}_{entry['hash']}"
+    )
+
+uploaded_files = st.file_uploader(
+    "📤 Upload food images (JPG, PNG, JPEG)",
+    type=["jpg", "png", "jpeg"],
+    accept_multiple_files=True,
+    help="Upload clear photos of food for best results"
+)
+
+if uploaded_files:
+    # Load and validate all uploads; hash the raw bytes once for caching
+    entries = []
+    for uploaded_file in uploaded_files:
+        try:
+            image_hash = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+            image = Image.open(uploaded_file).convert("RGB")
+
+            if not validate_image(image, uploaded_file.size):
+                continue
+
+            # Downscale a working copy for the models; processors resize
+            # to 224/384 regardless, so this only trims wasted pixel work
+            # on big uploads. The original stays around for display.
+            model_image = image
+            if max(image.size) > config.INFERENCE_MAX_SIDE:
+                model_image = image.copy()
+                model_image.thumbnail(
+                    (config.INFERENCE_MAX_SIDE, config.INFERENCE_MAX_SIDE),
+                    Image.Resampling.BILINEAR
+                )
+
+            entries.append({
+                # Position in the upload list; widget keys need it
+                # because the same image uploaded twice shares a hash
+                "index": len(entries),
+                "name": uploaded_file.name,
+                "hash": image_hash,
+                "image": image,
+                "model_image": model_image
+            })
+        except Exception as e:
+            st.error(f"❌ Error loading {uploaded_file.name}: {str(e)}")
+            st.info("Please upload a valid image file.")
+
+    if entries:
+        # Display images and controls
+        col1, col2 = st.columns([1, 1])
+
+        with col1:
+            if len(entries) == 1:
+                st.image(entries[0]["image"], caption="📷 Uploaded Image", use_container_width=True)
+
+                # Image info
+                st.caption(f"Image Size: {entries[0]['image'].size[0]} x {entries[0]['image'].size[1]} pixels")
+            else:
+                preview_cols = st.columns(min(len(entries), 3))
+                for idx, entry in enumerate(entries):
+                    with preview_cols[idx % len(preview_cols)]:
+                        st.image(entry["image"], caption=entry["name"], use_container_width=True)
+
+        with col2:
+            st.markdown("### 🔍 Analysis Options")
+
+            analyze_button = st.button(
+                "🍳 Generate Recipe" if len(entries) == 1 else f"🍳 Generate {len(entries)} Recipes",
+                type="primary",
+                use_container_width=True
+            )
+
+            if analyze_button:
+                # Progress tracking
+                progress_bar = st.progress(0)
+                status_text = st.empty()
+
+                try:
+                    status_text.text("🔍 Analyzing images...")
+                    progress_bar.progress(25)
+
+                    top_k = 5 if show_top_k else 1
+
+                    if len(entries) == 1:
+                        # Single image: caption and classification depend
+                        # only on the input image, so run them
+                        # concurrently (on GPU each gets its own CUDA
+                        # stream so the small ViT overlaps with BLIP's
+                        # encoder)
+                        entry = entries[0]
+                        prepped = prep_image(entry["model_image"])
+
+                        with ThreadPoolExecutor(max_workers=2) as executor:
+                            caption_future = executor.submit(
+                                _run_on_stream, cached_caption, entry["hash"],
+                                entry["model_image"], num_beams, prepped["blip"]
+                            )
+                            classify_future = executor.submit(
+                                _run_on_stream, cached_classify, entry["hash"],
+                                entry["model_image"], top_k, prepped["vit"]
+                            )
+
+                            captions = [caption_future.result()]
+                            predictions = [classify_future.result()]
+                    else:
+                        # Multiple images: one batched forward per model
+                        # beats per-image calls on both SIMD and GPU
+                        model_images = [e["model_image"] for e in entries]
+                        hashes = tuple(e["hash"] for e in entries)
+                        captions = cached_caption_batch(hashes, model_images, num_beams)
+                        predictions = cached_classify_batch(hashes, model_images, top_k)
+
+                    # Generate one recipe per image
+                    status_text.text("📝 Generating recipes...")
+                    progress_bar.progress(60)
+
+                    results = []
+                    for entry, caption, food_predictions in zip(entries, captions, predictions):
+                        primary_dish = food_predictions[0][0]
+                        recipe = cached_recipe(
+                            entry["hash"],
+                            primary_dish,
+                            caption,
+                            dietary_pref,
+                            servings,
+                            difficulty,
+                            num_beams
+                        )
+                        nutrition = estimate_nutrition(primary_dish)
+                        results.append(
+                            (entry, caption, food_predictions, primary_dish, recipe, nutrition)
+                        )
+
+                    progress_bar.progress(100)
+                    status_text.empty()
+                    progress_bar.empty()
+
+                    # Update statistics
+                    st.session_state.recipes_generated += len(results)
+
+                    # Display results
+                    st.markdown("---")
+
+                    if len(results) == 1:
+                        render_results(*results[0])
+                    else:
+                        tabs = st.tabs([entry["name"] for entry, *_ in results])
+                        for tab, result in zip(tabs, results):
+                            with tab:
+                                render_results(*result)
+
+                except Exception as e:
+                    st.error(f"❌ An error occurred during processing: {str(e)}")
+                    st.info("Please try uploading a different image or check your internet connection.")
+
+else:
+    # Landing state with examples
+    st.markdown("### 🌟 How It Works")
+    
+    col_info1, col_info2, col_info3 = st.columns(3)
+    
+    with col_info1:
+        st.markdown("""
+        <div style="text-align: center; padding: 2rem;">
+            <h2>1️⃣</h2>
+            <h4>Upload Image</h4>
+            <p>Take or upload a photo of your food</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col_info2:
+        st.markdown("""
+        <div style="text-align: center; padding: 2rem;">
+            <h2>2️⃣</h2>
+            <h4>AI Analysis</h4>
+            <p>Our AI identifies the dish and analyzes ingredients</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col_info3:
+        st.markdown("""
+        <div style="text-align: center; padding: 2rem;">
+            <h2>3️⃣</h2>
+            <h4>Get Recipe</h4>
+            <p>Receive a complete recipe with instructions</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    # Features
+    st.markdown("### ✨ Features")
+    
+    features_col1, features_col2 = st.columns(2)
+    
+    with features_col1:
+        st.markdown("""
+        - 🎯 **Accurate Food Detection** - Identify 101+ food items
+        - 📝 **Detailed Recipes** - Step-by-step cooking instructions
+        - 🥗 **Nutrition Estimates** - Calorie and macro information
+        - 🌱 **Dietary Options** - Support for various dietary restrictions
+        """)
+    
+    with features_col2:
+        st.markdown("""
+        - 🔢 **Serving Adjustments** - Scale recipes for any number
+        - 📊 **Confidence Scores** - Multiple predictions with probabilities
+        - 💾 **Recipe Export** - Download recipes as text files
+        - ⚡ **Fast Processing** - Quick AI-powered analysis
+        """)
+
+# Footer
+st.markdown("---")
+st.markdown("""
+<div style="text-align: center; color: #888;">
+    <p>Powered by BLIP, ViT, and FLAN-T5 🤖</p>
+    <p>Made with ❤️ using Streamlit</p>
+</div>
+""", unsafe_allow_html=True)
@@ -2,6 +2,8 @@
 Unit tests for AI Vision Recipe Generator
 """
 
+from unittest.mock import Mock
+
 import pytest
 from PIL import Image
 import numpy as np
@@ -10,28 +12,43 @@ from utils import validate_image, estimate_nutrition, format_recipe_text
 from config import config
 
 
+# Test images are immutable, so build each once per session instead of
+# re-allocating per test (the 5000x5000 one alone is ~75MB)
+@pytest.fixture(scope="session")
+def valid_image():
+    return Image.new('RGB', (100, 100), color='red')
+
+
+@pytest.fixture(scope="session")
+def small_image():
+    return Image.new('RGB', (30, 30), color='red')
+
+
+@pytest.fixture(scope="session")
+def big_image():
+    # validate_image only reads metadata, so a Mock with a .size is
+    # enough to exercise the too-large branch without allocating 75MB
+    return Mock(spec=Image.Image, size=(5000, 5000), mode='RGB')
+
+
 class TestUtils:
     """Test utility functions"""
-    
-    def test_validate_image_valid(self):
+
+    def test_validate_image_valid(self, valid_image):
         """Test image validation with valid image"""
-        # Create test image
-        img = Image.new('RGB', (100, 100), color='red')
-        is_valid, message = validate_image(img)
+        is_valid, message = validate_image(valid_image)
         assert is_valid is True
         assert message == ""
-    
-    def test_validate_image_too_small(self):
+
+    def test_validate_image_too_small(self, small_image):
         """Test image validation with small image"""
-        img = Image.new('RGB', (30, 30), color='red')
-        is_valid, message = validate_image(img)
+        is_valid, message = validate_image(small_image)
         assert is_valid is False
         assert "too small" in message.lower()
-    
-    def test_validate_image_too_large(self):
+
+    def test_validate_image_too_large(self, big_image):
         """Test image validation with large image"""
-        img = Image.new('RGB', (5000, 5000), color='red')
-        is_valid, message = validate_image(img)
+        is_valid, message = validate_image(big_image)
         assert is_valid is False
         assert "too large" in message.lower()
     
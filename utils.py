@@ -4,18 +4,24 @@ Utility functions for AI Vision Recipe Generator
 
 import torch
 from PIL import Image
-import io
 from typing import Dict, List, Tuple, Optional
 import streamlit as st
 
 
-def validate_image(image: Image.Image) -> Tuple[bool, str]:
+def validate_image(
+    image: Image.Image,
+    file_size: Optional[int] = None
+) -> Tuple[bool, str]:
     """
     Validate uploaded image for size and format
-    
+
+    Uses only image metadata — no pixel data is read or re-encoded,
+    so validation is O(1) regardless of image size.
+
     Args:
         image: PIL Image object
-        
+        file_size: Uploaded file size in bytes, if known
+
     Returns:
         Tuple of (is_valid, error_message)
     """
@@ -23,21 +29,19 @@ def validate_image(image: Image.Image) -> Tuple[bool, str]:
         # Check minimum dimensions
         if image.size[0] < 50 or image.size[1] < 50:
             return False, "Image is too small. Please upload a larger image (at least 50x50 pixels)."
-        
+
         # Check maximum dimensions
         if image.size[0] > 4096 or image.size[1] > 4096:
             return False, "Image is too large. Please upload an image smaller than 4096x4096 pixels."
-        
-        # Check file size (approximate)
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='PNG')
-        size_mb = len(img_byte_arr.getvalue()) / (1024 * 1024)
-        
-        if size_mb > 10:
+
+        # Check the uploaded file size when the caller knows it
+        # (replaces the old PNG re-encode, which decoded and
+        # re-compressed every pixel just to estimate this)
+        if file_size is not None and file_size / (1024 * 1024) > 10:
             return False, "Image file is too large. Please upload an image smaller than 10MB."
-        
+
         return True, ""
-        
+
     except Exception as e:
         return False, f"Error validating image: {str(e)}"
 
@@ -119,71 +123,99 @@ Visit: https://github.com/yourusername/ai-vision-recipe-generator
     return recipe_text
 
 
+# Comprehensive nutrition database
+NUTRITION_DB: Dict[str, Dict[str, str]] = {
+    # Italian
+    "pizza": {"calories": "285", "protein": "12g", "carbs": "36g", "fat": "10g"},
+    "pasta": {"calories": "350", "protein": "13g", "carbs": "60g", "fat": "7g"},
+    "lasagna": {"calories": "380", "protein": "18g", "carbs": "35g", "fat": "16g"},
+    "risotto": {"calories": "320", "protein": "8g", "carbs": "55g", "fat": "9g"},
+    
+    # American
+    "burger": {"calories": "540", "protein": "25g", "carbs": "40g", "fat": "27g"},
+    "hot dog": {"calories": "290", "protein": "11g", "carbs": "24g", "fat": "17g"},
+    "fries": {"calories": "365", "protein": "4g", "carbs": "48g", "fat": "17g"},
+    
+    # Asian
+    "sushi": {"calories": "200", "protein": "9g", "carbs": "30g", "fat": "6g"},
+    "ramen": {"calories": "450", "protein": "18g", "carbs": "60g", "fat": "15g"},
+    "fried rice": {"calories": "370", "protein": "12g", "carbs": "55g", "fat": "11g"},
+    "pad thai": {"calories": "400", "protein": "15g", "carbs": "50g", "fat": "14g"},
+    "curry": {"calories": "320", "protein": "16g", "carbs": "35g", "fat": "12g"},
+    "biryani": {"calories": "380", "protein": "20g", "carbs": "48g", "fat": "12g"},
+    "dosa": {"calories": "220", "protein": "6g", "carbs": "38g", "fat": "5g"},
+    "samosa": {"calories": "260", "protein": "5g", "carbs": "30g", "fat": "13g"},
+    
+    # Mexican
+    "taco": {"calories": "210", "protein": "13g", "carbs": "20g", "fat": "9g"},
+    "burrito": {"calories": "470", "protein": "21g", "carbs": "55g", "fat": "17g"},
+    "quesadilla": {"calories": "380", "protein": "17g", "carbs": "35g", "fat": "18g"},
+    
+    # Breakfast
+    "pancakes": {"calories": "220", "protein": "6g", "carbs": "38g", "fat": "5g"},
+    "waffles": {"calories": "240", "protein": "7g", "carbs": "40g", "fat": "6g"},
+    "omelette": {"calories": "180", "protein": "14g", "carbs": "3g", "fat": "12g"},
+    "cereal": {"calories": "150", "protein": "3g", "carbs": "32g", "fat": "2g"},
+    
+    # Healthy
+    "salad": {"calories": "150", "protein": "5g", "carbs": "15g", "fat": "8g"},
+    "soup": {"calories": "120", "protein": "6g", "carbs": "18g", "fat": "3g"},
+    "smoothie": {"calories": "180", "protein": "6g", "carbs": "35g", "fat": "2g"},
+    
+    # Desserts
+    "cake": {"calories": "350", "protein": "4g", "carbs": "50g", "fat": "16g"},
+    "ice cream": {"calories": "270", "protein": "5g", "carbs": "35g", "fat": "13g"},
+    "cookie": {"calories": "140", "protein": "2g", "carbs": "20g", "fat": "6g"},
+    "brownie": {"calories": "240", "protein": "3g", "carbs": "32g", "fat": "12g"},
+}
+
+# Keyword automaton for single-pass matching. pyahocorasick makes the
+# lookup O(len(dish)) regardless of database size; without it we fall
+# back to the linear scan, which is fine at the current DB size.
+try:
+    import ahocorasick
+
+    _NUTRITION_AUTOMATON = ahocorasick.Automaton()
+    for _key, _value in NUTRITION_DB.items():
+        _NUTRITION_AUTOMATON.add_word(_key, (_key, _value))
+    _NUTRITION_AUTOMATON.make_automaton()
+except ImportError:
+    _NUTRITION_AUTOMATON = None
+
+
 def estimate_nutrition(dish: str) -> Dict[str, str]:
     """
     Estimate nutritional information based on dish name
-    
+
     Note: This is a simplified estimation. For production,
     integrate with APIs like Edamam or Nutritionix.
-    
+
     Args:
         dish: Name of the dish
-        
+
     Returns:
         Dictionary with nutrition estimates
     """
-    # Comprehensive nutrition database
-    nutrition_db = {
-        # Italian
-        "pizza": {"calories": "285", "protein": "12g", "carbs": "36g", "fat": "10g"},
-        "pasta": {"calories": "350", "protein": "13g", "carbs": "60g", "fat": "7g"},
-        "lasagna": {"calories": "380", "protein": "18g", "carbs": "35g", "fat": "16g"},
-        "risotto": {"calories": "320", "protein": "8g", "carbs": "55g", "fat": "9g"},
-        
-        # American
-        "burger": {"calories": "540", "protein": "25g", "carbs": "40g", "fat": "27g"},
-        "hot dog": {"calories": "290", "protein": "11g", "carbs": "24g", "fat": "17g"},
-        "fries": {"calories": "365", "protein": "4g", "carbs": "48g", "fat": "17g"},
-        
-        # Asian
-        "sushi": {"calories": "200", "protein": "9g", "carbs": "30g", "fat": "6g"},
-        "ramen": {"calories": "450", "protein": "18g", "carbs": "60g", "fat": "15g"},
-        "fried rice": {"calories": "370", "protein": "12g", "carbs": "55g", "fat": "11g"},
-        "pad thai": {"calories": "400", "protein": "15g", "carbs": "50g", "fat": "14g"},
-        "curry": {"calories": "320", "protein": "16g", "carbs": "35g", "fat": "12g"},
-        "biryani": {"calories": "380", "protein": "20g", "carbs": "48g", "fat": "12g"},
-        "dosa": {"calories": "220", "protein": "6g", "carbs": "38g", "fat": "5g"},
-        "samosa": {"calories": "260", "protein": "5g", "carbs": "30g", "fat": "13g"},
-        
-        # Mexican
-        "taco": {"calories": "210", "protein": "13g", "carbs": "20g", "fat": "9g"},
-        "burrito": {"calories": "470", "protein": "21g", "carbs": "55g", "fat": "17g"},
-        "quesadilla": {"calories": "380", "protein": "17g", "carbs": "35g", "fat": "18g"},
-        
-        # Breakfast
-        "pancakes": {"calories": "220", "protein": "6g", "carbs": "38g", "fat": "5g"},
-        "waffles": {"calories": "240", "protein": "7g", "carbs": "40g", "fat": "6g"},
-        "omelette": {"calories": "180", "protein": "14g", "carbs": "3g", "fat": "12g"},
-        "cereal": {"calories": "150", "protein": "3g", "carbs": "32g", "fat": "2g"},
-        
-        # Healthy
-        "salad": {"calories": "150", "protein": "5g", "carbs": "15g", "fat": "8g"},
-        "soup": {"calories": "120", "protein": "6g", "carbs": "18g", "fat": "3g"},
-        "smoothie": {"calories": "180", "protein": "6g", "carbs": "35g", "fat": "2g"},
-        
-        # Desserts
-        "cake": {"calories": "350", "protein": "4g", "carbs": "50g", "fat": "16g"},
-        "ice cream": {"calories": "270", "protein": "5g", "carbs": "35g", "fat": "13g"},
-        "cookie": {"calories": "140", "protein": "2g", "carbs": "20g", "fat": "6g"},
-        "brownie": {"calories": "240", "protein": "3g", "carbs": "32g", "fat": "12g"},
-    }
-    
-    # Try to match dish with database (case-insensitive, partial match)
     dish_lower = dish.lower()
-    for key in nutrition_db:
-        if key in dish_lower or dish_lower in key:
-            return nutrition_db[key]
-    
+
+    if _NUTRITION_AUTOMATON is not None:
+        # Single pass over the dish name; prefer the longest match
+        best = None
+        for _, (key, value) in _NUTRITION_AUTOMATON.iter(dish_lower):
+            if best is None or len(key) > len(best[0]):
+                best = (key, value)
+        if best is not None:
+            return best[1]
+        # The dish name may itself be a fragment of a database key
+        for key in NUTRITION_DB:
+            if dish_lower in key:
+                return NUTRITION_DB[key]
+    else:
+        # Fallback: linear scan (case-insensitive, partial match)
+        for key in NUTRITION_DB:
+            if key in dish_lower or dish_lower in key:
+                return NUTRITION_DB[key]
+
     # Default values if no match found
     return {
         "calories": "~300",